@@ -47,20 +47,38 @@ PINSCRAPE_CATEGORIES = {
     'Still Life': 'still life objects ',
     'Multi-Figure': 'multi figure',
 }
+PINSCRAPE_CACHE_PATH = '.cache/pinscrape.sqlite'
+PINSCRAPE_CACHE_TTL = 24 * 60 * 60
+PINSCRAPE_CACHE_STALE_TTL = 7 * 24 * 60 * 60
+PINSCRAPE_HASH_INDEX_PATH = '.cache/pinscrape_hashes.json'
 
 YADISK_PATH_PREFIX = 'disk:/'
 YADISK_LISTINGS_PATH = ''
 YANDEX_CLIENT_ID = ''
 YANDEX_CLIENT_SECRET = ''
 YANDEX_ACCESS_TOKEN = ''
+YADISK_IMAGE_MAX_DIMENSION = 2560
 
 OPENAI_API_KEY = ''
 OPENAI_MODEL_NAME = ''
 OPENAI_SYSTEM_PROMPT = ''
 OPENAI_USER_PROMPT = ''
 
+# Set to a directory to persist generated lightbox articles and replay them on later builds
+LIGHTBOX_SNAPSHOT_PATH = ''
+# Longest side of the grid thumbnails rendered next to every lightbox image
+LIGHTBOX_THUMBNAIL_DIMENSION = 480
+
+BUILD_PROFILE_PATH = ''
+BUILD_TRACE_PATH = ''
+
 PLUGINS = []
 
+from plugins.quick_poser import build_profiler
+
+build_profiler.register()
+PLUGINS.append(build_profiler)
+
 from plugins.quick_poser import yadisk_lightbox_generator
 
 yadisk_lightbox_generator.register()
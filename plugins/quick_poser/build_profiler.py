@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from pelican import signals
+
+from quick_pose.build_profiler import profiler
+
+
+def start_profiling(pelican_obj):
+    # sent at the start of every run, so each `pelican -r` rebuild gets a report of its own
+    settings = pelican_obj.settings
+    if settings.get('BUILD_PROFILE_PATH') or settings.get('BUILD_TRACE_PATH'):
+        profiler.enable()
+
+
+def write_reports(pelican_obj):
+    if not profiler.enabled:
+        return
+
+    settings = pelican_obj.settings
+    if settings.get('BUILD_PROFILE_PATH'):
+        report_path = Path(settings['BUILD_PROFILE_PATH'])
+        profiler.write_report(report_path)
+        print(f'Build profile written to {report_path}')
+    if settings.get('BUILD_TRACE_PATH'):
+        trace_path = Path(settings['BUILD_TRACE_PATH'])
+        profiler.write_chrome_trace(trace_path)
+        print(f'Build trace written to {trace_path}')
+
+
+def register():
+    signals.get_generators.connect(start_profiling)
+    signals.finalized.connect(write_reports)
@@ -0,0 +1,88 @@
+import datetime
+import json
+import shutil
+from pathlib import Path
+
+from pelican.contents import Article
+from pelican.readers import BaseReader
+
+SNAPSHOT_FILENAME = 'articles.json'
+SNAPSHOT_FILES_DIRNAME = 'files'
+# bump whenever the article metadata changes shape, older snapshots are then ignored
+SNAPSHOT_VERSION = 2
+
+
+def _snapshot_path(settings, name: str) -> Path | None:
+    snapshot_path = settings.get('LIGHTBOX_SNAPSHOT_PATH')
+    return Path(snapshot_path).joinpath(name) if snapshot_path else None
+
+
+def create_article(base_reader: BaseReader, metadata: dict) -> Article:
+    return Article('', {
+        'template': 'lightbox',
+        'title': metadata['title'],
+        'date': metadata['date'],
+        'category': base_reader.process_metadata('category', metadata['category']),
+        'images': metadata['images'],
+    })
+
+
+def save_snapshot(settings, name: str, articles: [dict], image_filepaths: [Path]):
+    """Persists the generated lightbox articles and their images so later builds can replay them offline."""
+    snapshot_path = _snapshot_path(settings, name)
+    if snapshot_path is None:
+        return
+    if not articles:
+        # usually a throttled search or a missing listing, replaying nothing would hide the previous articles
+        print(f'No {name} articles generated, keeping the previous snapshot {snapshot_path}')
+        return
+
+    content_path = Path(settings['PATH'])
+    if snapshot_path.exists():
+        shutil.rmtree(snapshot_path)
+    files_path = snapshot_path.joinpath(SNAPSHOT_FILES_DIRNAME)
+    for image_filepath in image_filepaths:
+        snapshot_filepath = files_path.joinpath(image_filepath.relative_to(content_path))
+        snapshot_filepath.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(image_filepath, snapshot_filepath)
+
+    snapshot_path.mkdir(parents=True, exist_ok=True)
+    with open(snapshot_path.joinpath(SNAPSHOT_FILENAME), mode='w', encoding='utf-8') as fp:
+        json.dump({
+            'version': SNAPSHOT_VERSION,
+            'articles': [{**article, 'date': article['date'].isoformat()} for article in articles],
+        }, fp, indent=2)
+    print(f'Saved {len(articles)} {name} articles to snapshot {snapshot_path}')
+
+
+def replay_snapshot(article_generator, name: str) -> bool:
+    """Adds the articles of a previously saved snapshot, returns False when there is nothing to replay."""
+    settings = article_generator.settings
+    snapshot_path = _snapshot_path(settings, name)
+    if snapshot_path is None or not snapshot_path.joinpath(SNAPSHOT_FILENAME).exists():
+        return False
+
+    with open(snapshot_path.joinpath(SNAPSHOT_FILENAME), mode='r', encoding='utf-8') as fp:
+        snapshot = json.load(fp)
+    # the first snapshots were a bare list of articles with plain image URLs
+    version = snapshot.get('version') if isinstance(snapshot, dict) else 1
+    if version != SNAPSHOT_VERSION:
+        print(f'Ignoring {name} snapshot {snapshot_path} of version {version}, expected {SNAPSHOT_VERSION}')
+        return False
+
+    content_path = Path(settings['PATH'])
+    files_path = snapshot_path.joinpath(SNAPSHOT_FILES_DIRNAME)
+    if files_path.exists():
+        for snapshot_filepath in files_path.glob('**/*'):
+            image_filepath = content_path.joinpath(snapshot_filepath.relative_to(files_path))
+            if snapshot_filepath.is_file() and not image_filepath.exists():
+                image_filepath.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(snapshot_filepath, image_filepath)
+
+    articles = snapshot['articles']
+    base_reader = BaseReader(settings)
+    for article in articles:
+        article['date'] = datetime.datetime.fromisoformat(article['date'])
+        article_generator.articles.insert(0, create_article(base_reader, article))
+    print(f'Replayed {len(articles)} {name} articles from snapshot {snapshot_path}')
+    return True
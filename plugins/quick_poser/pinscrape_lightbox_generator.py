@@ -1,11 +1,15 @@
 import datetime
+import hashlib
+import html
+import io
 import json
 import logging
 import multiprocessing
 import random
-import shutil
+import re
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from operator import itemgetter
 from pathlib import Path
 from tempfile import TemporaryDirectory, NamedTemporaryFile
@@ -15,74 +19,286 @@ from PIL import Image, ImageOps, UnidentifiedImageError
 from bs4 import BeautifulSoup as soup
 from openai import OpenAI
 from pelican import signals
-from pelican.contents import Article
 from pelican.readers import BaseReader
+from requests.adapters import HTTPAdapter
 import urllib.parse
 
+from plugins.quick_poser.lightbox_snapshot import create_article, replay_snapshot, save_snapshot
+from quick_pose.build_profiler import profiler, timed_call
+from quick_pose.image_converter import IMAGE_DECODE_ERRORS
+from quick_pose.image_hash import HashIndex, dhash, unique_indices
+from quick_pose.image_metadata import describe_image, thumbnail_filepath
+from quick_pose.output_manifest import store_content_addressed
+from quick_pose.ttl_cache import TTLCache
+
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36 Edg/125.0.0.0'
+MAX_CONNECTIONS_PER_HOST = 8
+DOWNLOAD_TIMEOUT = (5, 20)  # connect, read
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+IMAGE_MIN_DIMENSION = 400
+IMAGE_MAX_BYTES = 25 * 1024 * 1024
+IMAGE_HEADER_MAX_BYTES = 256 * 1024
+RESULTS_CONTAINER_CLASS = b'dgControl'
+RESULT_LINK_CLASS = b'iusc'
+TAG_ATTRIBUTES_PATTERN = rb'(?:[^>"\']|"[^"]*"|\'[^\']*\')*'
+START_TAG_RE = re.compile(rb'<([a-z][\w:-]*)(' + TAG_ATTRIBUTES_PATTERN + rb')>', re.IGNORECASE)
+ATTRIBUTE_RE = re.compile(rb'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+))')
+
+
+def _start_tag_with_class(body: bytes, position: int, class_name: bytes) -> tuple[re.Match, dict] | None:
+    """Returns the start tag around `position` and its attributes if the tag has the class."""
+    tag_start = body.rfind(b'<', 0, position)
+    tag_match = START_TAG_RE.match(body, tag_start) if tag_start >= 0 else None
+    if tag_match is None or tag_match.end() <= position:
+        return None
+    attributes = {
+        name.lower(): double_quoted or single_quoted or unquoted
+        for name, double_quoted, single_quoted, unquoted in ATTRIBUTE_RE.findall(tag_match.group(2))
+    }
+    if class_name not in attributes.get(b'class', b'').split():
+        return None
+    return tag_match, attributes
+
+
+def _element_end(body: bytes, start_tag: re.Match) -> int:
+    """Finds the end tag closing `start_tag` by counting nested tags of the same name."""
+    tag_re = re.compile(rb'<(/?)' + re.escape(start_tag.group(1)) + rb'(?![\w:-])' + TAG_ATTRIBUTES_PATTERN + rb'>',
+                        re.IGNORECASE)
+    depth = 1
+    for tag_match in tag_re.finditer(body, start_tag.end()):
+        depth += -1 if tag_match.group(1) else 1
+        if depth == 0:
+            return tag_match.start()
+    return len(body)
+
+
+def _create_session(max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST) -> requests.Session:
+    # pool_block makes the adapter wait for a free connection instead of opening extra ones,
+    # which caps concurrent requests per host across all queries sharing the session
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_connections_per_host, pool_block=True)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 class PinterestImageScraper:
+    def __init__(self, session: requests.Session = None, cache: TTLCache = None, hash_index: HashIndex = None):
+        self.session = session or _create_session()
+        self.cache = cache
+        self.hash_index = hash_index
+
+    @staticmethod
+    def extract_image_urls(body: bytes) -> [str]:
+        """Fast path of `parse_image_urls`, scans the raw page for `.iusc` tags inside `.dgControl` without a DOM."""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        all_urls = []
+        position = body.find(RESULTS_CONTAINER_CLASS)
+        while position >= 0:
+            container = _start_tag_with_class(body, position, RESULTS_CONTAINER_CLASS)
+            if container is None:
+                position = body.find(RESULTS_CONTAINER_CLASS, position + len(RESULTS_CONTAINER_CLASS))
+                continue
+            container_tag, _ = container
+            container_end = _element_end(body, container_tag)
+            link_position = body.find(RESULT_LINK_CLASS, container_tag.end(), container_end)
+            while link_position >= 0:
+                link = _start_tag_with_class(body, link_position, RESULT_LINK_CLASS)
+                if link is None:
+                    link_position = body.find(RESULT_LINK_CLASS, link_position + len(RESULT_LINK_CLASS), container_end)
+                    continue
+                link_tag, attributes = link
+                metadata = html.unescape(attributes.get(b'm', b'{}').decode('utf-8', errors='replace'))
+                all_urls.append(json.loads(metadata).get('murl', ''))
+                link_position = body.find(RESULT_LINK_CLASS, link_tag.end(), container_end)
+            # nested containers are already covered by the enclosing one
+            position = body.find(RESULTS_CONTAINER_CLASS, container_end)
+        return all_urls
+
+    @staticmethod
+    def parse_image_urls(body) -> [str]:
+        document = soup(body, 'html.parser')
+        links = document.select('.dgControl .iusc')
+        return [json.loads(link.get('m', '{}')).get('murl', '') for link in links]
+
     @staticmethod
     def get_pinterest_links(body):
-        html = soup(body, 'html.parser')
-        links = html.select('.dgControl .iusc')
-        all_urls = [json.loads(link.get('m', '{}')).get('murl', '') for link in links]
+        with profiler.span('link_extraction') as span:
+            all_urls = PinterestImageScraper.extract_image_urls(body) or PinterestImageScraper.parse_image_urls(body)
+            span['items'] = len(all_urls)
         pinterest_urls = {l for l in all_urls if 'pinterest' in l or 'i.pinimg.com' in l}
         return list(pinterest_urls), all_urls
 
-    @staticmethod
-    def start_scraping(query, proxies: dict = None):
+    def start_scraping(self, query, proxies: dict = None):
+        if self.cache is None:
+            return self.search(query, proxies)
+        # an empty result is usually a throttled or captcha page, retry it on the next build instead of caching
+        pinterest_urls, all_urls = self.cache.get_or_compute(
+            'bing', query, lambda: self.search(query, proxies), cacheable=lambda links: bool(links[0]))
+        return pinterest_urls, all_urls
+
+    def search(self, query, proxies: dict = None):
         query_param = urllib.parse.quote_plus(f'{query} pinterest')
         url = f'https://www.bing.com/images/search?q={query_param}&first=1&FORM=HDRSC3'
-        res = requests.get(url, proxies=proxies, headers={'User-Agent': USER_AGENT})
-        res.raise_for_status()
+        with profiler.span('search') as span:
+            res = self.session.get(url, proxies=proxies)
+            res.raise_for_status()
+            span['bytes'] = len(res.content)
         return PinterestImageScraper.get_pinterest_links(res.content)
 
-    def scrape(self, query: str, tmppath: Path, threads: int = 2, max_images: int = 1, proxies: dict = None) -> [str]:
-        pinterest_urls, all_urls = PinterestImageScraper.start_scraping(query, proxies)
+    def scrape(self, query: str, tmppath: Path, threads: int = 2, max_images: int = 1, proxies: dict = None,
+               process_pool: Executor = None) -> ([str], dict[Path, int]):
+        pinterest_urls, all_urls = self.start_scraping(query, proxies)
         print(f'Found {len(pinterest_urls)} links from {len(all_urls)} for {query}')
 
+        if self.hash_index is not None:
+            known_urls_count = len(pinterest_urls)
+            pinterest_urls = [url for url in pinterest_urls if not self.hash_index.is_known_duplicate(url)]
+            print(f'Skipped {known_urls_count - len(pinterest_urls)} known duplicate links for {query}')
+
         pinterest_urls = pinterest_urls[:max_images]
+        downloads = {}
         with ThreadPoolExecutor(max_workers=threads) as executor:
-            counts = executor.map(self.download, *[
-                (pinterest_urls[i:i + threads]
-                 for i in range(0, len(pinterest_urls), threads)),
-                [tmppath] * threads
-            ])
-            executor.shutdown(wait=True)
+            reencode_pool = process_pool or executor
+            futures = {executor.submit(profiler.bind(self.download), url, tmppath): url for url in pinterest_urls}
+            reencodes = {}
+            for future in as_completed(futures):
+                filepath = future.result()
+                if filepath is not None:
+                    reencode_future = reencode_pool.submit(timed_call, PinterestImageScraper.reencode, filepath)
+                    reencodes[reencode_future] = futures[future], filepath
+
+            for future, (url, filepath) in reencodes.items():
+                hash_value, start, duration, pid = future.result()
+                profiler.record('reencode', start, duration, pid=pid, items=1)
+                if hash_value is None:
+                    continue
+                if self.hash_index is not None:
+                    self.hash_index.add_url(url, hash_value)
+                    if not self.hash_index.claim(hash_value):
+                        print(f'Skipping {url}, the same image was downloaded for another query')
+                        filepath.unlink(missing_ok=True)
+                        continue
+                downloads[filepath] = hash_value
+
+        return pinterest_urls, downloads
 
-        return pinterest_urls, sum(counts)
+    @staticmethod
+    def probe(header: bytes) -> tuple[str, tuple[int, int]] | None:
+        try:
+            with Image.open(io.BytesIO(header)) as im:
+                return im.format, im.size
+        except (OSError, EOFError, SyntaxError):
+            return None
 
     @staticmethod
-    def download(url_list, tmppath) -> int:
-        counts = 0
-        for url in url_list:
-            with NamedTemporaryFile(dir=tmppath, suffix='.jpg', delete=False) as fp:
-                r = requests.get(url, stream=True)
-                if r.ok:
-                    shutil.copyfileobj(r.raw, fp)
-                    fp.close()
-                    try:
-                        im = Image.open(fp.name)
-                        im = ImageOps.exif_transpose(im)
-                        rgb_im = im.convert('RGB')
-                        rgb_im.save(fp.name)
-                        counts += 1
-                    except UnidentifiedImageError as e:
-                        pass
+    def is_acceptable(url, image_format: str, size: tuple[int, int]) -> bool:
+        if image_format not in IMAGE_FORMATS:
+            print(f'Skipping {url}, unsupported format {image_format}')
+            return False
+        if min(size) < IMAGE_MIN_DIMENSION:
+            print(f'Skipping {url}, image is too small {size[0]}x{size[1]}')
+            return False
+        return True
+
+    def download(self, url, tmppath) -> Path | None:
+        with profiler.span('http_transfer') as span:
+            filepath = self.fetch(url, tmppath)
+            if filepath is not None:
+                span['bytes'] = filepath.stat().st_size
+                span['items'] = 1
+        return filepath
+
+    def fetch(self, url, tmppath) -> Path | None:
+        filepath = None
+        try:
+            with self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+                if not r.ok:
+                    return None
+                content_type = r.headers.get('Content-Type', '')
+                if not content_type.startswith('image/'):
+                    print(f'Skipping {url}, unexpected content type {content_type}')
+                    return None
+                if int(r.headers.get('Content-Length') or 0) > IMAGE_MAX_BYTES:
+                    print(f'Skipping {url}, content length exceeds {IMAGE_MAX_BYTES} bytes')
+                    return None
+
+                with NamedTemporaryFile(dir=tmppath, suffix='.jpg', delete=False) as fp:
+                    filepath = Path(fp.name)
+                    if self.stream_image(url, r, fp):
+                        return filepath
+        except requests.RequestException as ex:
+            print(f'Could not download {url}: {ex}')
+
+        if filepath is not None:
+            filepath.unlink(missing_ok=True)
+        return None
 
-        return counts
+    @staticmethod
+    def stream_image(url, response: requests.Response, fp) -> bool:
+        """Writes the response body, aborting as soon as the header or the size rules the image out."""
+        header = bytearray()
+        probed = False
+        size = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > IMAGE_MAX_BYTES:
+                print(f'Skipping {url}, body exceeds {IMAGE_MAX_BYTES} bytes')
+                return False
+            fp.write(chunk)
+            if probed:
+                continue
+
+            header += chunk
+            probe = PinterestImageScraper.probe(bytes(header))
+            if probe is not None:
+                if not PinterestImageScraper.is_acceptable(url, *probe):
+                    return False
+                probed = True
+                header = None
+            elif len(header) > IMAGE_HEADER_MAX_BYTES:
+                print(f'Skipping {url}, image header was not recognized')
+                return False
+
+        return probed
 
+    @staticmethod
+    def reencode(filepath: Path) -> int | None:
+        """Re-encodes the image as JPEG in place and returns its perceptual hash."""
+        try:
+            im = Image.open(filepath)
+            im = ImageOps.exif_transpose(im)
+            rgb_im = im.convert('RGB')
+            rgb_im.save(filepath, format='JPEG')
+            return dhash(rgb_im)
+        except UnidentifiedImageError:
+            filepath.unlink(missing_ok=True)
+            return None
+
+
+def _open_cache(cache_path: str, ttl: float, stale_ttl: float):
+    if not cache_path:
+        return nullcontext()
+    return TTLCache(Path(cache_path), ttl, stale_ttl)
+
+
+def _generate_search_queries(openai_api_key, openai_model_name, messages) -> dict[str, list[str]]:
+    client = OpenAI(api_key=openai_api_key)
+    with profiler.span('openai'):
+        completion = client.chat.completions.create(
+            model=openai_model_name, messages=messages, response_format={'type': 'json_object'})
 
-scraper = PinterestImageScraper()
+    search_queries = json.loads(completion.choices[0].message.content)
+    assert search_queries, 'No search queries loaded'
+    return search_queries
 
 
 def _get_queries_per_category(pinscrape_categories,
                               openai_api_key, openai_model_name, openai_system_prompt, openai_user_prompt,
-                              number_of_queries=3) -> list[tuple[str, str]]:
-    client = OpenAI(api_key=openai_api_key)
-
+                              number_of_queries=3, cache: TTLCache = None) -> list[tuple[str, str]]:
     messages = []
     if openai_system_prompt:
         messages.append({'role': 'system', 'content': openai_system_prompt})
@@ -93,11 +309,12 @@ def _get_queries_per_category(pinscrape_categories,
 
     print(messages)
 
-    completion = client.chat.completions.create(
-        model=openai_model_name, messages=messages, response_format={'type': 'json_object'})
-
-    search_queries = json.loads(completion.choices[0].message.content)
-    assert search_queries, 'No search queries loaded'
+    if cache is None:
+        search_queries = _generate_search_queries(openai_api_key, openai_model_name, messages)
+    else:
+        cache_key = hashlib.sha256(json.dumps([openai_model_name, messages]).encode('utf-8')).hexdigest()
+        search_queries = cache.get_or_compute(
+            'openai', cache_key, lambda: _generate_search_queries(openai_api_key, openai_model_name, messages))
 
     search_queries = {
         category: random.choices(search_queries, k=number_of_queries)
@@ -106,29 +323,46 @@ def _get_queries_per_category(pinscrape_categories,
     return list(search_queries.items())
 
 
-def _download(category: str, query: str, max_images: int, categories: [str], tmppath: Path):
+def _download(scraper: PinterestImageScraper, category: str, query: str, max_images: int, categories: [str],
+              tmppath: Path, process_pool: Executor = None) -> [(Path, int)]:
     download_filepaths = []
     if categories and category not in categories:
         print(f'Skipping query {query}, category {category} is not whitelisted')
         return download_filepaths
 
     try:
-        pinterest_urls, downloaded_count = scraper.scrape(query, tmppath, multiprocessing.cpu_count(), max_images)
+        with profiler.span('query', category=category, query=query):
+            pinterest_urls, downloads = scraper.scrape(
+                query, tmppath, multiprocessing.cpu_count(), max_images, process_pool=process_pool)
     except Exception as ex:
         logging.exception(str(ex))
         raise RuntimeError from ex
 
     if pinterest_urls:
-        print(f'Found {len(pinterest_urls)} urls for query {query}, downloaded {downloaded_count}')
-        download_filepaths = list(tmppath.iterdir())
+        print(f'Found {len(pinterest_urls)} urls for query {query}, downloaded {len(downloads)}')
+        download_filepaths = list(downloads.items())
         print(f'Downloaded {len(download_filepaths)} files')
     else:
         print(f'Skipping query {query}, nothing downloaded')
     return download_filepaths
 
 
+def _drop_duplicates(downloads: [(Path, int)], hash_index: HashIndex) -> [(Path, int)]:
+    # the largest file wins among near-duplicates, it is usually the highest resolution copy of a pin
+    downloads = sorted(downloads, key=lambda d: d[0].stat().st_size, reverse=True)
+    downloads = [d for d in downloads if not hash_index.is_published(d[1])]
+    return [downloads[idx] for idx in unique_indices([h for _, h in downloads], hash_index.max_distance)]
+
+
 def add_article(article_generator):
+    with profiler.span('add_article', plugin='pinscrape'):
+        _add_article(article_generator)
+
+
+def _add_article(article_generator):
     settings = article_generator.settings
+    if replay_snapshot(article_generator, 'pinscrape'):
+        return
 
     (
         pinscrape_categories,
@@ -140,6 +374,11 @@ def add_article(article_generator):
         openai_model_name,
         openai_system_prompt,
         openai_user_prompt,
+        cache_path,
+        cache_ttl,
+        cache_stale_ttl,
+        hash_index_path,
+        thumbnail_dimension,
     ) = itemgetter(
         'PINSCRAPE_CATEGORIES',
         'PATH',
@@ -150,52 +389,85 @@ def add_article(article_generator):
         'OPENAI_MODEL_NAME',
         'OPENAI_SYSTEM_PROMPT',
         'OPENAI_USER_PROMPT',
+        'PINSCRAPE_CACHE_PATH',
+        'PINSCRAPE_CACHE_TTL',
+        'PINSCRAPE_CACHE_STALE_TTL',
+        'PINSCRAPE_HASH_INDEX_PATH',
+        'LIGHTBOX_THUMBNAIL_DIMENSION',
     )(settings)
 
-    queries = _get_queries_per_category(pinscrape_categories,
-                                        openai_api_key, openai_model_name, openai_system_prompt, openai_user_prompt,
-                                        number_of_queries=3)
-    queries = [(category, query) for category, category_queries in queries for query in category_queries]
-
-    with TemporaryDirectory() as tmpdir:
-        root_tmppath = Path(tmpdir)
-        download_filepaths = defaultdict(list)
-        for query_idx, (category, query) in enumerate(queries):
-            tmppath = root_tmppath.joinpath(f'{category}{query_idx}')
-            tmppath.mkdir(parents=True, exist_ok=True)
-            download_filepaths[category].extend(_download(
-                category, query, images_number_per_category * 3, categories, tmppath))
-
-        base_reader = BaseReader(settings)
-
-        for category, image_filepaths in download_filepaths.items():
-            selected_images = random.sample(image_filepaths, min(len(image_filepaths), images_number_per_category))
-
-            print(
-                f'Category {category} has total images count: {len(image_filepaths)}, '
-                f'needed: {images_number_per_category}, selected: {len(selected_images)}')
-
-            images = []
-            for image_tmp_filepath in selected_images:
-                image_path = f'{category}/{image_tmp_filepath.name}'
-                image_filepath = content_path / Path(images_path) / image_path
-                image_filepath.parent.mkdir(parents=True, exist_ok=True)
-                image_url = f'{images_path}/{image_path}'
-                images.append(image_url)
-                shutil.move(image_tmp_filepath, image_filepath)
-
-            if images:
-                print(f'Selected images count: {len(images)}')
-                new_article = Article('', {
-                    'template': 'lightbox',
-                    'title': category,
-                    'date': datetime.datetime.now(),
-                    'category': base_reader.process_metadata('category', category),
-                    'images': images,
-                })
-                article_generator.articles.insert(0, new_article)
-            else:
-                print(f'No images selected for {category}, skipping article')
+    hash_index = HashIndex(hash_index_path)
+
+    with _open_cache(cache_path, cache_ttl, cache_stale_ttl) as cache:
+        queries = _get_queries_per_category(pinscrape_categories,
+                                            openai_api_key, openai_model_name, openai_system_prompt, openai_user_prompt,
+                                            number_of_queries=3, cache=cache)
+        queries = [(category, query) for category, category_queries in queries for query in category_queries]
+        scraper = PinterestImageScraper(cache=cache, hash_index=hash_index)
+
+        # workers start lazily while the query, download and cache threads are running,
+        # forking a multi-threaded process can leave a child stuck on an inherited lock
+        with TemporaryDirectory() as tmpdir, \
+                ProcessPoolExecutor(mp_context=multiprocessing.get_context('forkserver')) as process_pool, \
+                ThreadPoolExecutor(max_workers=max(len(queries), 1)) as query_executor:
+            root_tmppath = Path(tmpdir)
+            futures = {}
+            for query_idx, (category, query) in enumerate(queries):
+                tmppath = root_tmppath.joinpath(f'{category}{query_idx}')
+                tmppath.mkdir(parents=True, exist_ok=True)
+                future = query_executor.submit(
+                    profiler.bind(_download), scraper, category, query, images_number_per_category * 3, categories,
+                    tmppath, process_pool)
+                futures[future] = category
+
+            download_filepaths = defaultdict(list)
+            for future, category in futures.items():
+                download_filepaths[category].extend(future.result())
+
+            base_reader = BaseReader(settings)
+            snapshot_articles, snapshot_files = [], []
+
+            for category, image_filepaths in download_filepaths.items():
+                with profiler.span('deduplication', counters={'items': len(image_filepaths)}, category=category):
+                    unique_image_filepaths = _drop_duplicates(image_filepaths, hash_index)
+                print(f'Category {category} has {len(image_filepaths) - len(unique_image_filepaths)} duplicate images')
+                image_filepaths = unique_image_filepaths
+                selected_images = random.sample(image_filepaths, min(len(image_filepaths), images_number_per_category))
+
+                print(
+                    f'Category {category} has total images count: {len(image_filepaths)}, '
+                    f'needed: {images_number_per_category}, selected: {len(selected_images)}')
+
+                images, published_hashes = [], []
+                for image_tmp_filepath, hash_value in selected_images:
+                    image_filepath = store_content_addressed(
+                        image_tmp_filepath, content_path / Path(images_path) / category)
+                    image_site_path = f'{images_path}/{category}/{image_filepath.name}'
+                    try:
+                        with profiler.span('image_metadata', counters={'items': 1}):
+                            image = describe_image(image_filepath, image_site_path, thumbnail_dimension)
+                    except IMAGE_DECODE_ERRORS as ex:
+                        print(f'Could not read image {image_filepath}: {ex}')
+                        image_filepath.unlink(missing_ok=True)
+                        thumbnail_filepath(image_filepath).unlink(missing_ok=True)
+                        continue
+                    images.append(image)
+                    published_hashes.append(hash_value)
+                    snapshot_files.extend([image_filepath, thumbnail_filepath(image_filepath)])
+
+                hash_index.add_published(published_hashes)
+
+                if images:
+                    print(f'Selected images count: {len(images)}')
+                    metadata = {'title': category, 'date': datetime.datetime.now(), 'category': category, 'images': images}
+                    article_generator.articles.insert(0, create_article(base_reader, metadata))
+                    snapshot_articles.append(metadata)
+                else:
+                    print(f'No images selected for {category}, skipping article')
+
+            save_snapshot(settings, 'pinscrape', snapshot_articles, snapshot_files)
+
+    hash_index.save()
 
 
 def register():
@@ -1,8 +1,8 @@
 import datetime
+import io
 import json
 import random
 import shutil
-import urllib.parse
 from operator import itemgetter
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -10,13 +10,127 @@ from tempfile import TemporaryDirectory
 import requests
 import yadisk
 from pelican import signals
-from pelican.contents import Article
+from PIL import Image
 from pelican.readers import BaseReader
 from yadisk.exceptions import PathNotFoundError
 
+from plugins.quick_poser.lightbox_snapshot import create_article, replay_snapshot, save_snapshot
+from quick_pose.build_profiler import profiler
+from quick_pose.image_converter import IMAGE_DECODE_ERRORS, convert_and_resize_image
+from quick_pose.image_metadata import describe_image, thumbnail_filepath
+from quick_pose.output_manifest import store_content_addressed
+
+IMAGE_HEADER_MAX_BYTES = 256 * 1024
+IMAGE_HEADER_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+
+def _download_file(url: str, filepath: Path, headers: dict = None) -> bool:
+    with profiler.span('http_transfer') as span:
+        r = requests.get(url, headers=headers, allow_redirects=True, stream=True)
+        if not r.ok:
+            print(f'Could not download {url}, status: {r.status_code}: {r.text}')
+            return False
+        with open(filepath, 'wb') as f:
+            shutil.copyfileobj(r.raw, f)
+        span['bytes'] = filepath.stat().st_size
+        span['items'] = 1
+    return True
+
+
+def _download_preview(ya_client: yadisk.Client, yandex_access_token: str, obj_path: str,
+                      image_filepath: Path, max_dimension: int) -> tuple[int, int] | None:
+    """Downloads the preview fitted into `max_dimension` and returns its size, None if there is no usable preview."""
+    try:
+        with profiler.span('link_resolution'):
+            meta = ya_client.get_meta(obj_path, preview_size=f'{max_dimension}x{max_dimension}', preview_crop=False)
+    except PathNotFoundError:
+        return None
+    if not meta.preview:
+        return None
+    if not _download_file(meta.preview, image_filepath, headers={'Authorization': f'OAuth {yandex_access_token}'}):
+        return None
+    try:
+        with Image.open(image_filepath) as im:
+            im.verify()
+            return im.size
+    except IMAGE_DECODE_ERRORS:
+        print(f'Preview of {obj_path} could not be decoded, falling back to original')
+        image_filepath.unlink(missing_ok=True)
+        return None
+
+
+def _get_download_link(ya_client: yadisk.Client, obj_path: str) -> str | None:
+    try:
+        with profiler.span('link_resolution'):
+            return ya_client.get_download_link(obj_path)
+    except PathNotFoundError:
+        print(f'Download link was not generated for {obj_path}')
+        return None
+
+
+def _read_dimensions(url: str) -> tuple[int, int] | None:
+    """Reads the image size from the first bytes of the file instead of downloading all of it."""
+    with profiler.span('http_transfer') as span, requests.get(
+            url, headers={'Range': f'bytes=0-{IMAGE_HEADER_MAX_BYTES - 1}'}, allow_redirects=True, stream=True) as r:
+        if not r.ok:
+            return None
+        header = r.raw.read(IMAGE_HEADER_MAX_BYTES)
+        span['bytes'] = len(header)
+    try:
+        with Image.open(io.BytesIO(header)) as im:
+            # camera raw files open as TIFF and report the size of their embedded thumbnail
+            return im.size if im.format in IMAGE_HEADER_FORMATS else None
+    except IMAGE_DECODE_ERRORS:
+        return None
+
+
+def _download_image(ya_client: yadisk.Client, yandex_access_token: str, obj_path: str,
+                    image_filepath: Path, max_dimension: int, tmppath: Path) -> bool:
+    original_url = None
+    preview_size = max_dimension and _download_preview(
+        ya_client, yandex_access_token, obj_path, image_filepath, max_dimension)
+    if preview_size:
+        if max(preview_size) >= max_dimension:
+            return True
+        # a preview smaller than the box is the full resolution rendition only if the original is not larger,
+        # previews are never upscaled but their size may be capped
+        original_url = _get_download_link(ya_client, obj_path)
+        original_size = original_url and _read_dimensions(original_url)
+        if original_size and max(preview_size) >= max(original_size):
+            return True
+        print(f'Preview of {obj_path} is smaller than {max_dimension}px and the original, falling back to original')
+        image_filepath.unlink(missing_ok=True)
+
+    original_url = original_url or _get_download_link(ya_client, obj_path)
+    if original_url is None:
+        return False
+
+    if not max_dimension:
+        return _download_file(original_url, image_filepath)
+
+    original_filepath = tmppath.joinpath(f'original{Path(obj_path).suffix}')
+    try:
+        if not _download_file(original_url, original_filepath):
+            return False
+        with profiler.span('image_resize', counters={'items': 1}):
+            return convert_and_resize_image(original_filepath, image_filepath, target_dimension=max_dimension)
+    except IMAGE_DECODE_ERRORS as ex:
+        print(f'Could not convert original of {obj_path}: {ex}')
+        image_filepath.unlink(missing_ok=True)
+        return False
+    finally:
+        original_filepath.unlink(missing_ok=True)
+
 
 def add_article(article_generator):
+    with profiler.span('add_article', plugin='yadisk'):
+        _add_article(article_generator)
+
+
+def _add_article(article_generator):
     settings = article_generator.settings
+    if replay_snapshot(article_generator, 'yadisk'):
+        return
 
     (
         yadisk_path_prefix,
@@ -28,6 +142,8 @@ def add_article(article_generator):
         images_path,
         images_number_per_category,
         categories,
+        max_dimension,
+        thumbnail_dimension,
     ) = itemgetter(
         'YADISK_PATH_PREFIX',
         'YADISK_LISTINGS_PATH',
@@ -38,18 +154,24 @@ def add_article(article_generator):
         'IMAGES_PATH',
         'IMAGES_NUMBER_PER_CATEGORY',
         'CATEGORIES',
+        'YADISK_IMAGE_MAX_DIMENSION',
+        'LIGHTBOX_THUMBNAIL_DIMENSION',
     )(settings)
 
     ya_client = yadisk.Client(yandex_client_id, yandex_client_secret, yandex_access_token)
     with ya_client, TemporaryDirectory() as tmpdir:
         tmppath = Path(tmpdir)
-        assert ya_client.check_token(), 'Yandex Disk token is invalid'
-        listing_files = [
-            Path(obj.path[len(yadisk_path_prefix):])
-            for obj in ya_client.listdir(f'{yadisk_path_prefix}{yadisk_listings_path}')
-            if obj.is_file()
-        ]
+        with profiler.span('token_check'):
+            assert ya_client.check_token(), 'Yandex Disk token is invalid'
+        with profiler.span('listing_list') as span:
+            listing_files = [
+                Path(obj.path[len(yadisk_path_prefix):])
+                for obj in ya_client.listdir(f'{yadisk_path_prefix}{yadisk_listings_path}')
+                if obj.is_file()
+            ]
+            span['items'] = len(listing_files)
         base_reader = BaseReader(settings)
+        snapshot_articles, snapshot_files = [], []
 
         for listing_file in listing_files:
             category = listing_file.stem
@@ -59,12 +181,15 @@ def add_article(article_generator):
 
             local_filepath = tmppath.joinpath(listing_file.name)
             try:
-                ya_client.download(f'/{str(listing_file)}', str(local_filepath))
+                with profiler.span('listing_download', category=category) as span:
+                    ya_client.download(f'/{str(listing_file)}', str(local_filepath))
+                    span['bytes'] = local_filepath.stat().st_size
             except PathNotFoundError as e:
                 print(f'Listing file was not found at {str(listing_file)}')
                 continue
 
-            with open(local_filepath, mode='r', encoding='utf-8') as fp:
+            with profiler.span('category', category=category), \
+                    open(local_filepath, mode='r', encoding='utf-8') as fp:
                 images = []
                 lines = fp.readlines()
                 selected_images = random.sample(lines, min(len(lines), images_number_per_category))
@@ -74,42 +199,38 @@ def add_article(article_generator):
 
                 for line in selected_images:
                     image_details = json.loads(line)
-                    try:
-                        # original_url = image_details['original_url']
-                        # assert original_url, f'Original URL is not available for {image_details["obj_path"]}'
-                        original_url = ya_client.get_download_link(image_details['obj_path'])
-                    except (PathNotFoundError, AssertionError):
-                        print(f'Download link was not generated for {image_details["obj_path"]}')
-                        continue
-
-                    r = requests.get(original_url, allow_redirects=True, stream=True)
-                    if not r.ok:
-                        print(f'Could not download image: {image_details["original_url"]}, '
-                              f'status: {r.status_code}: {r.text}')
-                        continue
                     root_path, obj_path = Path(image_details['root_path']), Path(image_details['obj_path'])
                     image_path = obj_path.relative_to(root_path)
-                    image_filepath = content_path / Path(images_path) / image_path
-                    image_filepath.parent.mkdir(parents=True, exist_ok=True)
-                    image_url = images_path / image_path
-                    with open(image_filepath, 'wb') as f:
-                        shutil.copyfileobj(r.raw, f)
+                    download_filepath = tmppath.joinpath(f'image{image_path.suffix}')
+                    if not _download_image(ya_client, yandex_access_token, image_details['obj_path'],
+                                           download_filepath, max_dimension, tmppath):
+                        print(f'Could not download image: {image_details["obj_path"]}')
+                        continue
 
-                    images.append('/'.join(urllib.parse.quote(p, safe='/') for p in image_url.parts))
+                    image_filepath = store_content_addressed(
+                        download_filepath, content_path / Path(images_path) / image_path.parent)
+                    image_site_path = Path(images_path, image_path.parent, image_filepath.name).as_posix()
+                    try:
+                        with profiler.span('image_metadata', counters={'items': 1}):
+                            image = describe_image(image_filepath, image_site_path, thumbnail_dimension)
+                    except IMAGE_DECODE_ERRORS as ex:
+                        print(f'Could not read image {image_details["obj_path"]}: {ex}')
+                        image_filepath.unlink(missing_ok=True)
+                        thumbnail_filepath(image_filepath).unlink(missing_ok=True)
+                        continue
+                    images.append(image)
+                    snapshot_files.extend([image_filepath, thumbnail_filepath(image_filepath)])
 
                 if images:
                     print(f'Selected images count: {len(images)}')
-                    new_article = Article('', {
-                        'template': 'lightbox',
-                        'title': category,
-                        'date': datetime.datetime.now(),
-                        'category': base_reader.process_metadata('category', category),
-                        'images': images,
-                    })
-                    article_generator.articles.insert(0, new_article)
+                    metadata = {'title': category, 'date': datetime.datetime.now(), 'category': category, 'images': images}
+                    article_generator.articles.insert(0, create_article(base_reader, metadata))
+                    snapshot_articles.append(metadata)
                 else:
                     print(f'No images selected for {category}, skipping article')
 
+        save_snapshot(settings, 'yadisk', snapshot_articles, snapshot_files)
+
 
 def register():
     signals.article_generator_pretaxonomy.connect(add_article)
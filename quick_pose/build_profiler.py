@@ -0,0 +1,118 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import typing as t
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+_labels = contextvars.ContextVar('build_profiler_labels', default={})
+
+
+def timed_call(func: t.Callable, *args, **kwargs) -> t.Tuple[t.Any, float, float, int]:
+    """Runs `func` and returns its result with start time, duration and pid, for use inside worker processes."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, start, time.perf_counter() - start, os.getpid()
+
+
+class BuildProfiler:
+    """Collects timed spans labelled by plugin, category and phase.
+
+    Labels passed to `span` are inherited by the spans nested in it, including spans in threads started
+    through `bind`. Counters such as `bytes` or `items` belong to a single span: they are passed as
+    `counters` or set on the dict yielded by `span`, and are never inherited.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.spans = []
+        self.started_at = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, counters: dict = None, **labels):
+        counters = dict(counters or {})
+        if not self.enabled:
+            yield counters
+            return
+
+        labels = {**_labels.get(), **labels}
+        token = _labels.set(labels)
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            duration = time.perf_counter() - start
+            _labels.reset(token)
+            self.record(name, start, duration, **{**labels, **counters})
+
+    def record(self, name: str, start: float, duration: float, pid: int = None, tid: int = None, **fields):
+        if not self.enabled:
+            return
+        fields = {**_labels.get(), **fields}
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start': start - self.started_at,
+                'duration': duration,
+                'pid': pid or os.getpid(),
+                'tid': tid or threading.get_ident(),
+                **fields,
+            })
+
+    def bind(self, func: t.Callable) -> t.Callable:
+        """Wraps `func` to run with the labels of the calling context, for submitting to thread pools."""
+        return partial(contextvars.copy_context().run, func)
+
+    def report(self) -> dict:
+        phases = defaultdict(lambda: {'count': 0, 'duration': 0.0, 'bytes': 0, 'items': 0})
+        for span in self.spans:
+            phase = phases[span.get('plugin'), span.get('category'), span['name']]
+            phase['count'] += 1
+            phase['duration'] += span['duration']
+            phase['bytes'] += span.get('bytes', 0)
+            phase['items'] += span.get('items', 0)
+
+        return {
+            'duration': time.perf_counter() - self.started_at,
+            'phases': [
+                {'plugin': plugin, 'category': category, 'phase': name, **totals}
+                for (plugin, category, name), totals in sorted(phases.items(), key=lambda p: -p[1]['duration'])
+            ],
+            'spans': self.spans,
+        }
+
+    def write_report(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode='w', encoding='utf-8') as fp:
+            json.dump(self.report(), fp, indent=2, default=str)
+
+    def write_chrome_trace(self, path: Path):
+        events = [
+            {
+                'name': span['name'],
+                'cat': span.get('plugin') or '',
+                'ph': 'X',
+                'ts': span['start'] * 1e6,
+                'dur': span['duration'] * 1e6,
+                'pid': span['pid'],
+                'tid': span['tid'],
+                'args': {k: v for k, v in span.items() if k not in ('name', 'start', 'duration', 'pid', 'tid')},
+            }
+            for span in self.spans
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode='w', encoding='utf-8') as fp:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fp, default=str)
+
+
+profiler = BuildProfiler()
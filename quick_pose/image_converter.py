@@ -11,6 +11,9 @@ from dask.distributed import LocalCluster
 import click
 import dask.utils
 
+# raised when a file is not a decodable image, e.g. a corrupt download or an HTML error page
+IMAGE_DECODE_ERRORS = (OSError, EOFError, SyntaxError, Image.DecompressionBombError, rawpy.LibRawError)
+
 
 def format_to_suffix(format: str):
     return f'.{format.lstrip(".").lower()}'
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from PIL.Image import Resampling
+
+HASH_SIZE = 8
+MAX_HAMMING_DISTANCE = 6
+URL_TTL = 180 * 24 * 3600
+MAX_URLS = 50_000
+MAX_PUBLISHED = 20_000
+
+
+def dhash(im: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Difference hash: compares horizontally adjacent pixels of a downscaled grayscale image."""
+    pixels = np.asarray(im.convert('L').resize((hash_size + 1, hash_size), Resampling.BILINEAR), dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distances(hash_value: int, hashes: t.Sequence[int] | np.ndarray) -> np.ndarray:
+    xor = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(hash_value))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def is_near_duplicate(hash_value: int, hashes: t.Sequence[int] | np.ndarray,
+                      max_distance: int = MAX_HAMMING_DISTANCE) -> bool:
+    if len(hashes) == 0:
+        return False
+    return bool(hamming_distances(hash_value, hashes).min() <= max_distance)
+
+
+def unique_indices(hashes: t.Sequence[int], max_distance: int = MAX_HAMMING_DISTANCE) -> t.List[int]:
+    """Indices of hashes left after dropping near-duplicates, earlier entries win."""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    kept = []
+    for idx, hash_value in enumerate(hashes):
+        if not is_near_duplicate(hash_value, hashes[kept], max_distance):
+            kept.append(idx)
+    return kept
+
+
+class HashIndex:
+    """Persistent record of image hashes seen per URL and of hashes already published.
+
+    URLs not seen for ``url_ttl`` seconds expire, and both records keep only their newest
+    ``max_urls`` and ``max_published`` entries.
+    """
+
+    def __init__(self, path: Path | None, max_distance: int = MAX_HAMMING_DISTANCE, url_ttl: float = URL_TTL,
+                 max_urls: int = MAX_URLS, max_published: int = MAX_PUBLISHED):
+        self.path = Path(path) if path else None
+        self.max_distance = max_distance
+        self.url_ttl = url_ttl
+        self.max_urls = max_urls
+        self.max_published = max_published
+        self.urls = {}
+        self.published = []
+        if self.path and self.path.exists():
+            with open(self.path, mode='r', encoding='utf-8') as fp:
+                data = json.load(fp)
+            now = time.time()
+            for url, entry in data.get('urls', {}).items():
+                # older indexes stored the bare hash without the time the URL was last seen
+                hash_value, seen_at = (entry, now) if isinstance(entry, int) else entry
+                if now - seen_at < self.url_ttl:
+                    self.urls[url] = hash_value, seen_at
+            self.published = data.get('published', [])[-self.max_published:]
+        self._published_hashes = np.asarray(self.published, dtype=np.uint64)
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    def is_known_duplicate(self, url: str) -> bool:
+        """Whether the URL is known to point at an image already published or claimed by another URL in this build."""
+        with self._lock:
+            entry = self.urls.get(url)
+            if entry is None:
+                return False
+            hash_value, _ = entry
+            self.urls[url] = hash_value, time.time()
+            return hash_value in self._claimed or self.is_published(hash_value)
+
+    def claim(self, hash_value: int) -> bool:
+        """Reserves a downloaded image for this build, False if another URL already claimed it."""
+        with self._lock:
+            if hash_value in self._claimed:
+                return False
+            self._claimed.add(hash_value)
+            return True
+
+    def add_url(self, url: str, hash_value: int):
+        with self._lock:
+            self.urls[url] = hash_value, time.time()
+
+    def is_published(self, hash_value: int) -> bool:
+        return is_near_duplicate(hash_value, self._published_hashes, self.max_distance)
+
+    def add_published(self, hashes: t.Iterable[int]):
+        with self._lock:
+            self.published = (self.published + list(hashes))[-self.max_published:]
+            self._published_hashes = np.asarray(self.published, dtype=np.uint64)
+
+    def save(self):
+        if not self.path:
+            return
+        urls = dict(sorted(self.urls.items(), key=lambda item: item[1][1])[-self.max_urls:])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, mode='w', encoding='utf-8') as fp:
+            json.dump({'urls': urls, 'published': self.published}, fp)
@@ -0,0 +1,71 @@
+import base64
+import io
+import urllib.parse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+from PIL.Image import Resampling
+
+THUMBNAILS_DIRNAME = 'thumbs'
+THUMBNAIL_DIMENSION = 480
+PLACEHOLDER_DIMENSION = 16
+PLACEHOLDER_BLUR_RADIUS = 1
+
+
+def box_blur(pixels: np.ndarray, radius: int) -> np.ndarray:
+    """Separable box blur of an (height, width, channels) array with clamped edges."""
+    size = 2 * radius + 1
+    pixels = pixels.astype(np.float64)
+    for axis in (0, 1):
+        pad = [(radius, radius) if a == axis else (0, 0) for a in range(pixels.ndim)]
+        cumsum = np.cumsum(np.pad(pixels, pad, mode='edge'), axis=axis)
+        cumsum = np.insert(cumsum, 0, 0, axis=axis)
+        length = pixels.shape[axis]
+        upper = np.take(cumsum, np.arange(size, size + length), axis=axis)
+        lower = np.take(cumsum, np.arange(0, length), axis=axis)
+        pixels = (upper - lower) / size
+    return pixels
+
+
+def placeholder_data_uri(im: Image.Image, dimension: int = PLACEHOLDER_DIMENSION,
+                         radius: int = PLACEHOLDER_BLUR_RADIUS) -> str:
+    small = im.convert('RGB')
+    small.thumbnail((dimension, dimension), Resampling.BILINEAR)
+    blurred = box_blur(np.asarray(small), radius)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(blurred.round(), 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=70)
+    return f'data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode("ascii")}'
+
+
+def thumbnail_filepath(image_filepath: Path) -> Path:
+    return image_filepath.parent.joinpath(THUMBNAILS_DIRNAME, image_filepath.name)
+
+
+def describe_image(image_filepath: Path, image_path: str, thumbnail_dimension: int = THUMBNAIL_DIMENSION) -> dict:
+    """Writes a grid thumbnail next to the image and returns the metadata the lightbox template renders.
+
+    `image_path` is the unquoted site path of the image, the returned URLs are percent-encoded
+    so they stay valid inside whitespace separated srcset candidates.
+    """
+    with Image.open(image_filepath) as im:
+        rgb_im = ImageOps.exif_transpose(im).convert('RGB')
+
+    width, height = rgb_im.size
+    thumbnail = rgb_im.copy()
+    thumbnail.thumbnail((thumbnail_dimension, thumbnail_dimension), Resampling.LANCZOS)
+    thumbnail_path = thumbnail_filepath(image_filepath)
+    if not thumbnail_path.exists():
+        thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+        thumbnail.save(thumbnail_path, format='JPEG', quality=80)
+
+    image_dirname = image_path.rpartition('/')[0]
+    return {
+        'url': urllib.parse.quote(image_path, safe='/'),
+        'width': width,
+        'height': height,
+        'thumbnail_url': urllib.parse.quote(f'{image_dirname}/{THUMBNAILS_DIRNAME}/{image_filepath.name}', safe='/'),
+        'thumbnail_width': thumbnail.width,
+        'thumbnail_height': thumbnail.height,
+        'placeholder': placeholder_data_uri(thumbnail),
+    }
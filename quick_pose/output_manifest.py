@@ -0,0 +1,100 @@
+import hashlib
+import html
+import json
+import re
+import shutil
+import typing as t
+import urllib.parse
+from pathlib import Path
+
+MANIFEST_FILENAME = '.publish-manifest.json'
+CONTENT_HASH_LENGTH = 16
+CHUNK_SIZE = 1024 * 1024
+URL_ATTRIBUTE_RE = re.compile(r'\b(href|src|srcset|content)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+))',
+                              re.IGNORECASE)
+SRCSET_CANDIDATE_RE = re.compile(r'[\s,]*(\S+)')
+
+
+def content_hash(filepath: Path) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_content_addressed(source_filepath: Path, dest_path: Path) -> Path:
+    """Moves the file into `dest_path` under a name derived from its content, identical files share one name."""
+    dest_filepath = dest_path.joinpath(
+        f'{content_hash(source_filepath)[:CONTENT_HASH_LENGTH]}{source_filepath.suffix.lower()}')
+    dest_path.mkdir(parents=True, exist_ok=True)
+    if dest_filepath.exists():
+        source_filepath.unlink()
+    else:
+        shutil.move(source_filepath, dest_filepath)
+    return dest_filepath
+
+
+def build_manifest(output_path: Path) -> t.Dict[str, str]:
+    return {
+        filepath.relative_to(output_path).as_posix(): content_hash(filepath)
+        for filepath in sorted(output_path.glob('**/*'))
+        if filepath.is_file() and filepath.name != MANIFEST_FILENAME
+    }
+
+
+def read_manifest(manifest: str | None) -> t.Dict[str, str]:
+    return json.loads(manifest) if manifest else {}
+
+
+def write_manifest(output_path: Path, manifest: t.Dict[str, str]):
+    with open(output_path.joinpath(MANIFEST_FILENAME), mode='w', encoding='utf-8') as fp:
+        json.dump(manifest, fp, indent=0, sort_keys=True)
+
+
+def diff_manifests(previous: t.Dict[str, str], current: t.Dict[str, str]) -> t.Tuple[t.List[str], t.List[str]]:
+    """Returns paths to upload (new or changed) and paths to delete."""
+    upload = [path for path, digest in current.items() if previous.get(path) != digest]
+    delete = [path for path in previous if path not in current]
+    return upload, delete
+
+
+def _srcset_urls(srcset: str) -> t.List[str]:
+    # a candidate is a URL followed by optional descriptors up to the next comma,
+    # a URL ending with commas has no descriptors
+    urls, position = [], 0
+    while (candidate := SRCSET_CANDIDATE_RE.match(srcset, position)) is not None:
+        url, position = candidate.group(1), candidate.end()
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            descriptors_end = srcset.find(',', position)
+            position = len(srcset) if descriptors_end < 0 else descriptors_end + 1
+        urls.append(url)
+    return urls
+
+
+def referenced_urls(page: str) -> t.Iterator[str]:
+    """Yields the URLs of the href, src, srcset and content attributes of an HTML page."""
+    for name, double_quoted, single_quoted, unquoted in URL_ATTRIBUTE_RE.findall(page):
+        value = html.unescape(double_quoted or single_quoted or unquoted).strip()
+        yield from _srcset_urls(value) if name.lower() == 'srcset' else [value]
+
+
+def prune_unreferenced(output_path: Path, images_path: str) -> t.List[str]:
+    """Deletes files under `images_path` of the output that no HTML page references."""
+    reference_re = re.compile(rf'(?:^|/){re.escape(images_path)}/(.+)$')
+    references = set()
+    for page in output_path.glob('**/*.html'):
+        for url in referenced_urls(page.read_text(encoding='utf-8', errors='replace')):
+            match = reference_re.search(urllib.parse.unquote(urllib.parse.urlsplit(url).path))
+            if match:
+                references.add(f'{images_path}/{match.group(1)}')
+
+    pruned = []
+    for filepath in sorted(output_path.joinpath(images_path).glob('**/*')):
+        relative_path = filepath.relative_to(output_path).as_posix()
+        if filepath.is_file() and relative_path not in references:
+            filepath.unlink()
+            pruned.append(relative_path)
+    return pruned
@@ -0,0 +1,159 @@
+import json
+import os
+import time
+import typing as t
+import urllib.parse
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import click
+import requests
+
+from quick_pose.build_profiler import profiler
+from quick_pose.stand_in_server import DEFAULT_CATEGORIES, StandInServer, StandInState
+
+REDIRECTED_HOSTS = ('cloud-api.yandex.net', 'www.bing.com')
+STAND_IN_TOKEN = 'stand-in'
+SOURCE_PATH = Path('Photos')
+LISTINGS_PATH = Path('listings')
+MIME_TYPES = ['image/jpg', 'image/jpeg']
+RUNS = ('refresher', 'yadisk', 'pinscrape')
+
+
+def _rewrite_url(url: str, base_url: str) -> str | None:
+    parts = urllib.parse.urlsplit(url)
+    if parts.hostname not in REDIRECTED_HOSTS:
+        return None
+    base = urllib.parse.urlsplit(base_url)
+    return urllib.parse.urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+@contextmanager
+def redirect_to(base_url: str):
+    """Sends requests traffic for the live service hosts, and the OpenAI client, to the stand-in server."""
+    session_request = requests.Session.request
+    openai_base_url = os.environ.get('OPENAI_BASE_URL')
+
+    def request(self, method, url, *args, **kwargs):
+        return session_request(self, method, _rewrite_url(url, base_url) or url, *args, **kwargs)
+
+    requests.Session.request = request
+    os.environ['OPENAI_BASE_URL'] = f'{base_url}/v1'
+    try:
+        yield
+    finally:
+        requests.Session.request = session_request
+        if openai_base_url is None:
+            os.environ.pop('OPENAI_BASE_URL')
+        else:
+            os.environ['OPENAI_BASE_URL'] = openai_base_url
+
+
+def _plugin_settings(content_path: Path, categories: t.List[str], images_number_per_category: int) -> dict:
+    from pelican.settings import read_settings
+
+    return read_settings(override={
+        'PATH': str(content_path),
+        'IMAGES_PATH': 'images',
+        'IMAGES_NUMBER_PER_CATEGORY': images_number_per_category,
+        'CATEGORIES': (),
+        'YADISK_PATH_PREFIX': 'disk:/',
+        'YADISK_LISTINGS_PATH': str(LISTINGS_PATH),
+        'YADISK_IMAGE_MAX_DIMENSION': 2560,
+        'LIGHTBOX_THUMBNAIL_DIMENSION': 480,
+        'YANDEX_CLIENT_ID': '',
+        'YANDEX_CLIENT_SECRET': '',
+        'YANDEX_ACCESS_TOKEN': STAND_IN_TOKEN,
+        'PINSCRAPE_CATEGORIES': {category: category.lower() for category in categories},
+        'PINSCRAPE_CACHE_PATH': '',
+        'PINSCRAPE_CACHE_TTL': 0,
+        'PINSCRAPE_CACHE_STALE_TTL': 0,
+        'PINSCRAPE_HASH_INDEX_PATH': '',
+        'OPENAI_API_KEY': STAND_IN_TOKEN,
+        'OPENAI_MODEL_NAME': 'stand-in',
+        'OPENAI_SYSTEM_PROMPT': '',
+        'OPENAI_USER_PROMPT': '{category_hints}',
+    })
+
+
+def _run_refresher(categories: t.List[str], tmppath: Path):
+    from quick_pose.yadisk_listings_refresher import list_remote_files, write_listings
+
+    listings_path = tmppath.joinpath('listings')
+    listings_path.mkdir()
+    # refresh() fans categories out over a dask cluster, the listing work per category is the same
+    for category in categories:
+        list_remote_files(SOURCE_PATH, MIME_TYPES, '', '', STAND_IN_TOKEN, listings_path, category)
+    write_listings(LISTINGS_PATH, '', '', STAND_IN_TOKEN, listings_path)
+
+
+def _run_plugin(plugin: str, settings: dict):
+    if plugin == 'yadisk':
+        from plugins.quick_poser.yadisk_lightbox_generator import add_article
+    else:
+        from plugins.quick_poser.pinscrape_lightbox_generator import add_article
+
+    article_generator = SimpleNamespace(settings=settings, articles=[])
+    add_article(article_generator)
+    return len(article_generator.articles)
+
+
+def _measure(state: StandInState, name: str, func: t.Callable) -> dict:
+    state.reset_stats()
+    profiler.enable()
+    start = time.perf_counter()
+    result = func()
+    wall_time = time.perf_counter() - start
+    click.echo(f'{name}: {wall_time:.2f}s')
+    return {
+        'name': name,
+        'wall_time': wall_time,
+        'result': result,
+        'server': state.summary(),
+        'phases': profiler.report()['phases'],
+    }
+
+
+@click.command()
+@click.option('--files', default=100_000, help='number of synthetic files on the stand-in disk')
+@click.option('--files-per-dir', default=500, help='number of synthetic files per directory')
+@click.option('--categories', multiple=True, default=DEFAULT_CATEGORIES, help='categories to generate')
+@click.option('--latency', default=0.0, help='latency added to every stand-in response, in seconds')
+@click.option('--error-rate', default=0.0, help='fraction of stand-in responses replaced with a 503')
+@click.option('--images-per-category', default=5, help='IMAGES_NUMBER_PER_CATEGORY for plugin runs')
+@click.option('--run', 'runs', type=click.Choice(RUNS), multiple=True, default=RUNS, help='runs to measure')
+@click.option('--output', type=click.Path(dir_okay=False, path_type=Path), help='write the JSON report to file')
+def harness(files: int, files_per_dir: int, categories: t.List[str], latency: float, error_rate: float,
+            images_per_category: int, runs: t.List[str], output: Path):
+    categories = list(categories)
+    click.echo(f'Generating {files} files in {len(categories)} categories')
+    state = StandInState(files, categories, root=str(SOURCE_PATH), files_per_dir=files_per_dir,
+                         latency=latency, error_rate=error_rate)
+
+    report = {'files': files, 'latency': latency, 'error_rate': error_rate, 'runs': []}
+    with StandInServer(state) as server, redirect_to(server.base_url), TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        content_path = tmppath.joinpath('content')
+        content_path.mkdir()
+        settings = _plugin_settings(content_path, categories, images_per_category)
+
+        if 'refresher' in runs:
+            report['runs'].append(_measure(state, 'refresher', lambda: _run_refresher(categories, tmppath)))
+        elif 'yadisk' in runs:
+            # the yadisk plugin reads the listings the refresher uploads
+            _run_refresher(categories, tmppath)
+        for plugin in ('yadisk', 'pinscrape'):
+            if plugin in runs:
+                report['runs'].append(_measure(state, plugin, lambda: _run_plugin(plugin, settings)))
+
+    report = json.dumps(report, indent=2, default=str)
+    if output:
+        output.write_text(report, encoding='utf-8')
+    else:
+        click.echo(report)
+
+
+if __name__ == '__main__':
+    harness()
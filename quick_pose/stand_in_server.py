@@ -0,0 +1,384 @@
+import hashlib
+import html
+import io
+import json
+import random
+import re
+import threading
+import time
+import typing as t
+import urllib.parse
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw
+
+YADISK_API_PATH = '/v1/disk'
+OPENAI_API_PATH = '/v1/chat/completions'
+BING_SEARCH_PATH = '/images/search'
+PINIMG_PATH = '/i.pinimg.com/'
+FILES_PATH = '/files/'
+PREVIEW_PATH = '/preview/'
+UPLOAD_PATH = '/upload/'
+
+IMAGE_SIZE = (3000, 2000)
+IMAGE_VARIANTS = 16
+DEFAULT_CATEGORIES = ('Animals', 'Portrait', 'Figure', 'Nature', 'Sculpture', 'Still Life', 'Multi-Figure')
+
+
+def _normalize_path(path: str) -> str:
+    if path.startswith('disk:'):
+        path = path[len('disk:'):]
+    return path.strip('/')
+
+
+def _render_jpeg(size: t.Tuple[int, int], seed: int = 0) -> bytes:
+    # random blocks on a coarse grid, upscaled, so that every variant has a distinct perceptual hash
+    rnd = random.Random(seed)
+    im = Image.new('RGB', (12, 8))
+    draw = ImageDraw.Draw(im)
+    for x in range(12):
+        for y in range(8):
+            draw.point((x, y), fill=(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+    im = im.resize(size, Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    im.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _variant(key: str) -> int:
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest(), 16) % IMAGE_VARIANTS
+
+
+class StandInState:
+    """In-memory Yandex Disk tree with request statistics shared by all handler threads."""
+
+    def __init__(self, files_count: int, categories: t.Iterable[str], root: str = 'Photos',
+                 files_per_dir: int = 500, latency: float = 0.0, error_rate: float = 0.0,
+                 bing_results: int = 35, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bing_results = bing_results
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {'requests': 0, 'errors': 0, 'bytes_in': 0, 'bytes_out': 0})
+
+        self.nodes = {'': {'type': 'dir'}}
+        self.children = defaultdict(list)
+        self.images = [_render_jpeg(IMAGE_SIZE, seed=seed + idx) for idx in range(IMAGE_VARIANTS)]
+        self.previews = {}
+        self._generate_tree(root, list(categories), files_count, files_per_dir)
+
+    def _generate_tree(self, root: str, categories: t.List[str], files_count: int, files_per_dir: int):
+        self.mkdir(root)
+        for category_idx, category in enumerate(categories):
+            category_path = f'{root}/{category}'
+            self.mkdir(category_path)
+            category_files = files_count // len(categories) + (category_idx < files_count % len(categories))
+            for file_idx in range(category_files):
+                dir_path = f'{category_path}/{file_idx // files_per_dir:04d}'
+                if dir_path not in self.nodes:
+                    self.mkdir(dir_path)
+                self.put_file(f'{dir_path}/{file_idx:06d}.jpg', None)
+
+    def mkdir(self, path: str):
+        parent, _, name = path.rpartition('/')
+        self.nodes[path] = {'type': 'dir'}
+        self.children[parent].append(name)
+
+    def put_file(self, path: str, content: bytes | None):
+        parent, _, name = path.rpartition('/')
+        if path not in self.nodes:
+            self.children[parent].append(name)
+        self.nodes[path] = {'type': 'file', 'content': content}
+
+    def remove(self, path: str):
+        parent, _, name = path.rpartition('/')
+        self.children[parent].remove(name)
+        for child in self.children.pop(path, []):
+            self.remove(f'{path}/{child}')
+        del self.nodes[path]
+
+    def image(self, key: str) -> bytes:
+        return self.images[_variant(key)]
+
+    def content(self, path: str) -> bytes:
+        content = self.nodes[path]['content']
+        return self.image(path) if content is None else content
+
+    def preview(self, path: str, box: int) -> bytes:
+        variant = _variant(path)
+        with self.lock:
+            if (variant, box) not in self.previews:
+                im = Image.open(io.BytesIO(self.images[variant]))
+                im.thumbnail((box, box))
+                buffer = io.BytesIO()
+                im.save(buffer, format='JPEG')
+                self.previews[variant, box] = buffer.getvalue()
+            return self.previews[variant, box]
+
+    def record(self, route: str, bytes_in: int, bytes_out: int, error: bool):
+        with self.lock:
+            stats = self.stats[route]
+            stats['requests'] += 1
+            stats['errors'] += error
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.clear()
+
+    def summary(self) -> dict:
+        with self.lock:
+            stats = {route: dict(values) for route, values in sorted(self.stats.items())}
+        return {
+            'routes': stats,
+            'requests': sum(s['requests'] for s in stats.values()),
+            'errors': sum(s['errors'] for s in stats.values()),
+            'bytes_in': sum(s['bytes_in'] for s in stats.values()),
+            'bytes_out': sum(s['bytes_out'] for s in stats.values()),
+        }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: 'StandInServer'
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, Nagle would delay every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    @property
+    def base_url(self) -> str:
+        return self.server.base_url
+
+    def _respond(self, route: str, status: int, body: bytes = b'', content_type: str = 'application/json',
+                 bytes_in: int = 0):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.state.record(route, bytes_in, len(body), status >= 400)
+
+    def _json(self, route: str, status: int, payload: dict, bytes_in: int = 0):
+        self._respond(route, status, json.dumps(payload).encode('utf-8'), bytes_in=bytes_in)
+
+    def _error(self, route: str, status: int, error: str, description: str):
+        self._json(route, status, {'error': error, 'message': description, 'description': description})
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _dispatch(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+        route, handler = self._route(url.path)
+        body = self._read_body() if self.command in ('POST', 'PUT') else b''
+
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.error_rate and self.state.random.random() < self.state.error_rate:
+            return self._error(route, 503, 'ServiceUnavailableError', 'Injected error')
+        return handler(route, url.path, query, body)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _dispatch
+
+    def _route(self, path: str) -> t.Tuple[str, t.Callable]:
+        if path == OPENAI_API_PATH:
+            return 'openai.chat', self._openai_chat
+        if path == BING_SEARCH_PATH:
+            return 'bing.search', self._bing_search
+        if path.startswith(PINIMG_PATH):
+            return 'pinimg', self._pinimg
+        if path.startswith(FILES_PATH):
+            return 'yadisk.file', self._file
+        if path.startswith(PREVIEW_PATH):
+            return 'yadisk.preview', self._preview
+        if path.startswith(UPLOAD_PATH):
+            return 'yadisk.upload_data', self._upload_data
+        if path == YADISK_API_PATH or path == f'{YADISK_API_PATH}/':
+            return 'yadisk.disk', self._disk_info
+        if path == f'{YADISK_API_PATH}/resources/download':
+            return 'yadisk.download_link', self._download_link
+        if path == f'{YADISK_API_PATH}/resources/upload':
+            return 'yadisk.upload_link', self._upload_link
+        if path.startswith(f'{YADISK_API_PATH}/operations/'):
+            return 'yadisk.operation', self._operation
+        if path == f'{YADISK_API_PATH}/resources':
+            return f'yadisk.resources.{self.command.lower()}', self._resources
+        return 'unknown', lambda route, *args: self._error(route, 404, 'NotFoundError', 'Unknown endpoint')
+
+    def _authorized(self, route: str) -> bool:
+        if not self.headers.get('Authorization'):
+            self._error(route, 401, 'UnauthorizedError', 'Not authorized')
+            return False
+        return True
+
+    def _resource(self, path: str, preview_size: str = None) -> dict:
+        node = self.state.nodes[path]
+        name = path.rpartition('/')[2]
+        resource = {'name': name, 'path': f'disk:/{path}', 'type': node['type'],
+                    'created': '2025-01-01T00:00:00+00:00', 'modified': '2025-01-01T00:00:00+00:00'}
+        if node['type'] == 'file':
+            quoted_path = urllib.parse.quote(path)
+            resource.update({
+                'mime_type': 'image/jpeg' if name.endswith('.jpg') else 'application/octet-stream',
+                'media_type': 'image',
+                'size': len(self.state.content(path)),
+                'preview': f'{self.base_url}{PREVIEW_PATH}{quoted_path}?size={preview_size or "S"}',
+                'sizes': [{'name': 'ORIGINAL', 'url': f'{self.base_url}{FILES_PATH}{quoted_path}'}],
+            })
+        return resource
+
+    def _disk_info(self, route, path, query, body):
+        if self._authorized(route):
+            self._json(route, 200, {'total_space': 10 ** 12, 'used_space': 0, 'trash_size': 0})
+
+    def _operation(self, route, path, query, body):
+        if self._authorized(route):
+            self._json(route, 200, {'status': 'success'})
+
+    def _resources(self, route, path, query, body):
+        if not self._authorized(route):
+            return
+        resource_path = _normalize_path(query.get('path', ''))
+        exists = resource_path in self.state.nodes
+
+        if self.command == 'PUT':
+            parent = resource_path.rpartition('/')[0]
+            if exists:
+                return self._error(route, 409, 'DiskPathPointsToExistentDirectoryError', 'Directory exists')
+            if parent not in self.state.nodes:
+                return self._error(route, 409, 'DiskPathDoesntExistsError', 'Parent does not exist')
+            with self.state.lock:
+                self.state.mkdir(resource_path)
+            return self._json(route, 201, {'href': f'{self.base_url}{path}?path={query["path"]}', 'method': 'GET',
+                                           'templated': False})
+
+        if not exists:
+            return self._error(route, 404, 'DiskNotFoundError', 'Resource not found')
+
+        if self.command == 'DELETE':
+            with self.state.lock:
+                self.state.remove(resource_path)
+            return self._respond(route, 204)
+
+        resource = self._resource(resource_path, query.get('preview_size'))
+        if resource['type'] == 'dir':
+            limit, offset = int(query.get('limit', 20)), int(query.get('offset', 0))
+            children = self.state.children[resource_path]
+            prefix = f'{resource_path}/' if resource_path else ''
+            resource['_embedded'] = {
+                'path': resource['path'], 'limit': limit, 'offset': offset, 'total': len(children),
+                'sort': '', 'items': [
+                    self._resource(f'{prefix}{name}', query.get('preview_size'))
+                    for name in children[offset:offset + limit]
+                ],
+            }
+        self._json(route, 200, resource)
+
+    def _download_link(self, route, path, query, body):
+        if not self._authorized(route):
+            return
+        resource_path = _normalize_path(query.get('path', ''))
+        if self.state.nodes.get(resource_path, {}).get('type') != 'file':
+            return self._error(route, 404, 'DiskNotFoundError', 'Resource not found')
+        href = f'{self.base_url}{FILES_PATH}{urllib.parse.quote(resource_path)}'
+        self._json(route, 200, {'href': href, 'method': 'GET', 'templated': False})
+
+    def _upload_link(self, route, path, query, body):
+        if not self._authorized(route):
+            return
+        resource_path = _normalize_path(query.get('path', ''))
+        if resource_path in self.state.nodes and query.get('overwrite', 'false') != 'true':
+            return self._error(route, 409, 'DiskResourceAlreadyExistsError', 'Resource already exists')
+        if resource_path.rpartition('/')[0] not in self.state.nodes:
+            return self._error(route, 409, 'DiskPathDoesntExistsError', 'Parent does not exist')
+        href = f'{self.base_url}{UPLOAD_PATH}{urllib.parse.quote(resource_path)}'
+        self._json(route, 200, {'operation_id': hashlib.md5(href.encode()).hexdigest(), 'href': href,
+                                'method': 'PUT', 'templated': False})
+
+    def _upload_data(self, route, path, query, body):
+        resource_path = urllib.parse.unquote(path[len(UPLOAD_PATH):])
+        with self.state.lock:
+            self.state.put_file(resource_path, body)
+        self._respond(route, 201, bytes_in=len(body))
+
+    def _file(self, route, path, query, body):
+        resource_path = urllib.parse.unquote(path[len(FILES_PATH):])
+        if self.state.nodes.get(resource_path, {}).get('type') != 'file':
+            return self._error(route, 404, 'DiskNotFoundError', 'Resource not found')
+        content_type = 'image/jpeg' if resource_path.endswith('.jpg') else 'application/octet-stream'
+        self._respond(route, 200, self.state.content(resource_path), content_type=content_type)
+
+    def _preview(self, route, path, query, body):
+        if not self._authorized(route):
+            return
+        resource_path = urllib.parse.unquote(path[len(PREVIEW_PATH):])
+        box = max(int(n) for n in re.findall(r'\d+', query.get('size', '')) or ['150'])
+        self._respond(route, 200, self.state.preview(resource_path, box), content_type='image/jpeg')
+
+    def _bing_search(self, route, path, query, body):
+        search = query.get('q', '')
+        digest = hashlib.md5(search.encode('utf-8')).hexdigest()[:12]
+        anchors = '\n'.join(
+            '<li><div class="imgpt"><a class="iusc" href="/images/search?view=detailV2" m="{}">'
+            '<img src="data:," alt=""/></a></div></li>'.format(html.escape(json.dumps({
+                'murl': f'{self.base_url}{PINIMG_PATH}{digest}/{idx:03d}.jpg',
+                't': f'{search} {idx}',
+            })))
+            for idx in range(self.state.bing_results)
+        )
+        page = f'<!DOCTYPE html><html><body><div class="dgControl"><ul>{anchors}</ul></div></body></html>'
+        self._respond(route, 200, page.encode('utf-8'), content_type='text/html; charset=utf-8')
+
+    def _pinimg(self, route, path, query, body):
+        self._respond(route, 200, self.state.image(path), content_type='image/jpeg')
+
+    def _openai_chat(self, route, path, query, body):
+        request = json.loads(body or b'{}')
+        prompt = '\n'.join(str(m.get('content', '')) for m in request.get('messages', []))
+        categories = re.findall(r'Category: (.+?), search hint', prompt) or list(DEFAULT_CATEGORIES)
+        content = {category: [f'{category} reference pose {idx}' for idx in range(5)] for category in categories}
+        self._json(route, 200, {
+            'id': 'chatcmpl-stand-in',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stand-in'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': json.dumps(content)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }, bytes_in=len(body))
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local stand-in for the subset of Yandex Disk, Bing image search and OpenAI used by this project."""
+
+    daemon_threads = True
+
+    def __init__(self, state: StandInState, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), StandInHandler)
+        self.state = state
+        self.base_url = f'http://{host}:{self.server_address[1]}'
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self._thread.join()
+        self.server_close()
@@ -0,0 +1,89 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+T = t.TypeVar('T')
+
+
+class TTLCache:
+    """Persistent JSON value cache backed by SQLite.
+
+    Entries younger than ``ttl`` seconds are served as is. Entries older than that but younger than
+    ``ttl + stale_ttl`` are served immediately while being recomputed in the background
+    (stale-while-revalidate). Anything older is recomputed synchronously. Values rejected by the
+    ``cacheable`` predicate of ``get_or_compute`` are returned but never stored.
+    """
+
+    def __init__(self, path: Path, ttl: float, stale_ttl: float = 0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                         'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL, '
+                         'PRIMARY KEY (namespace, key))')
+        self._revalidating = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, namespace: str, key: str) -> t.Tuple[t.Any, float] | None:
+        with self._connect() as conn:
+            row = conn.execute('SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?',
+                               (namespace, key)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        return json.loads(value), time.time() - created_at
+
+    def set(self, namespace: str, key: str, value: t.Any):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO entries (namespace, key, value, created_at) VALUES (?, ?, ?, ?)',
+                         (namespace, key, json.dumps(value), time.time()))
+
+    def _revalidate(self, namespace: str, key: str, compute: t.Callable[[], T], cacheable: t.Callable[[T], bool]):
+        try:
+            value = compute()
+            if cacheable(value):
+                self.set(namespace, key, value)
+        except Exception as ex:
+            logging.warning(f'Revalidating {namespace}/{key} failed, keeping stale entry: {ex}')
+        finally:
+            with self._lock:
+                self._revalidating.discard((namespace, key))
+
+    def get_or_compute(self, namespace: str, key: str, compute: t.Callable[[], T],
+                       cacheable: t.Callable[[T], bool] = lambda value: True) -> T:
+        entry = self.get(namespace, key)
+        if entry is not None and cacheable(entry[0]):
+            value, age = entry
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                with self._lock:
+                    if (namespace, key) not in self._revalidating:
+                        self._revalidating.add((namespace, key))
+                        self._executor.submit(self._revalidate, namespace, key, compute, cacheable)
+                return value
+
+        value = compute()
+        if cacheable(value):
+            self.set(namespace, key, value)
+        return value
@@ -1,8 +1,11 @@
+import io
 import os
 import shlex
 import shutil
 import sys
 import datetime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
 
 from invoke import task
 from invoke.main import program
@@ -10,6 +13,15 @@ from pelican import main as pelican_main
 from pelican.server import ComplexHTTPRequestHandler, RootedHTTPServer
 from pelican.settings import DEFAULT_CONFIG, get_settings_from_file
 
+from quick_pose.output_manifest import (
+    MANIFEST_FILENAME,
+    build_manifest,
+    diff_manifests,
+    prune_unreferenced,
+    read_manifest,
+    write_manifest,
+)
+
 OPEN_BROWSER_ON_SERVE = True
 SETTINGS_FILE_BASE = "pelicanconf.py"
 SETTINGS = {}
@@ -25,6 +37,8 @@ CONFIG = {
     # Github Pages configuration
     "github_pages_branch": "gh-pages",
     "commit_message": f"'Publish site on {datetime.date.today().isoformat()}'",
+    # Lightbox articles snapshot replayed by `regenerate` and `livereload`
+    "snapshot_path": ".cache/lightbox_snapshot",
     # Host and port for `serve`
     "host": "localhost",
     "port": 8000,
@@ -52,9 +66,19 @@ def rebuild(c):
 
 
 @task
-def regenerate(c):
-    """Automatically regenerate site upon file modification"""
-    pelican_run("-r -s {settings_base}".format(**CONFIG))
+def refresh_snapshot(c):
+    """Remove the lightbox articles snapshot so the next build fetches remote content"""
+    if os.path.isdir(CONFIG["snapshot_path"]):
+        shutil.rmtree(CONFIG["snapshot_path"])
+
+
+@task
+def regenerate(c, refresh=False):
+    """Automatically regenerate site upon file modification, replaying the lightbox articles snapshot"""
+    if refresh:
+        refresh_snapshot(c)
+    cmd = "-r -s {settings_base} -e LIGHTBOX_SNAPSHOT_PATH='\"{snapshot_path}\"'"
+    pelican_run(cmd.format(**CONFIG))
 
 
 @task
@@ -94,12 +118,18 @@ def preview(c):
 
 
 @task
-def livereload(c):
+def livereload(c, refresh=False):
     """Automatically reload browser tab upon file modification."""
     from livereload import Server
 
+    if refresh:
+        refresh_snapshot(c)
+
     def cached_build():
-        cmd = "-s {settings_base} -e CACHE_CONTENT=true LOAD_CONTENT_CACHE=true"
+        cmd = (
+            "-s {settings_base} -e CACHE_CONTENT=true LOAD_CONTENT_CACHE=true "
+            "LIGHTBOX_SNAPSHOT_PATH='\"{snapshot_path}\"'"
+        )
         pelican_run(cmd.format(**CONFIG))
 
     cached_build()
@@ -109,6 +139,8 @@ def livereload(c):
         CONFIG["settings_base"],
         f"{theme_path}/templates/**/*.html",
     ]
+    for templates_path in SETTINGS["THEME_TEMPLATES_OVERRIDES"]:
+        watched_globs.append(f"{templates_path}/**/*.html")
 
     content_file_extensions = [".md", ".rst"]
     for extension in content_file_extensions:
@@ -132,23 +164,71 @@ def livereload(c):
     server.serve(host=CONFIG["host"], port=CONFIG["port"], root=CONFIG["deploy_path"])
 
 
+def prepare_output(previous_manifest):
+    """Prune unreferenced images, write the output manifest and return the paths to upload and to delete"""
+    deploy_path = Path(CONFIG["deploy_path"])
+    pruned = prune_unreferenced(deploy_path, SETTINGS["IMAGES_PATH"])
+    manifest = build_manifest(deploy_path)
+    upload, delete = diff_manifests(read_manifest(previous_manifest), manifest)
+    write_manifest(deploy_path, manifest)
+    sys.stderr.write(
+        f"Pruned {len(pruned)} unreferenced images, "
+        f"{len(upload)} of {len(manifest)} files to upload, {len(delete)} to delete\n"
+    )
+    return upload, delete
+
+
 @task
 def publish(c):
-    """Publish to production via rsync"""
+    """Publish to production via rsync, transferring only files changed since the last publish"""
     pelican_run("-s {settings_publish}".format(**CONFIG))
-    c.run(
-        'rsync --delete --exclude ".DS_Store" -pthrvz -c '
-        '-e "ssh -p {ssh_port}" '
-        "{} {ssh_user}@{ssh_host}:{ssh_path}".format(
-            CONFIG["deploy_path"].rstrip("/") + "/", **CONFIG
-        )
+    ssh = "ssh -p {ssh_port} {ssh_user}@{ssh_host}".format(**CONFIG)
+    previous = c.run(
+        "{} cat {ssh_path}/{}".format(ssh, MANIFEST_FILENAME, **CONFIG), warn=True, hide=True
     )
+    previous_manifest = previous.stdout if previous.ok else None
+    upload, delete = prepare_output(previous_manifest)
+    if not previous_manifest:
+        # Without the remote manifest there is no record of stale files on the server, mirror the whole output
+        c.run(
+            'rsync --delete --exclude ".DS_Store" -pthrvz -c '
+            '-e "ssh -p {ssh_port}" '
+            "{} {ssh_user}@{ssh_host}:{ssh_path}".format(
+                CONFIG["deploy_path"].rstrip("/") + "/", **CONFIG
+            )
+        )
+        return
+
+    with NamedTemporaryFile(mode="w", encoding="utf-8", suffix=".txt") as files_from:
+        files_from.write("\n".join(upload + [MANIFEST_FILENAME]))
+        files_from.flush()
+        c.run(
+            'rsync -pthvz --files-from={} -e "ssh -p {ssh_port}" '
+            "{} {ssh_user}@{ssh_host}:{ssh_path}".format(
+                files_from.name, CONFIG["deploy_path"].rstrip("/") + "/", **CONFIG
+            )
+        )
+    if delete:
+        c.run(
+            '{} "cd {ssh_path} && xargs -0 rm -f --"'.format(ssh, **CONFIG),
+            in_stream=io.StringIO("\0".join(delete)),
+        )
 
 
 @task
 def gh_pages(c):
-    """Publish to GitHub Pages"""
+    """Publish to GitHub Pages, pushing only objects changed since the last publish"""
     # preview(c)
+    # Fetching the published branch lets the push skip every object the remote already has,
+    # the orphan commit (-o) still replaces the whole tree so removed files are pruned
+    branch = CONFIG["github_pages_branch"]
+    c.run(f"git fetch --depth=1 origin +{branch}:refs/remotes/origin/{branch}", warn=True)
+    previous = c.run(f"git show origin/{branch}:{MANIFEST_FILENAME}", warn=True, hide=True)
+    upload, delete = prepare_output(previous.stdout if previous.ok else None)
+    if not upload and not delete:
+        sys.stderr.write("Nothing changed since the last publish\n")
+        return
+
     c.run(
         "ghp-import -b {github_pages_branch} "
         "-m {commit_message} -o -f "
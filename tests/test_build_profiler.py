@@ -0,0 +1,25 @@
+from quick_pose.build_profiler import BuildProfiler
+
+
+def test_counters_are_not_inherited_by_nested_spans():
+    profiler = BuildProfiler()
+    profiler.enable()
+    with profiler.span('category', counters={'items': 3}, category='Hands') as outer:
+        with profiler.span('http_transfer') as inner:
+            inner['bytes'] = 10
+        outer['items'] += 1
+
+    transfer, category = profiler.spans
+    assert transfer['category'] == 'Hands' and transfer['bytes'] == 10 and 'items' not in transfer
+    assert category['items'] == 4
+
+    phases = {phase['phase']: phase for phase in profiler.report()['phases']}
+    assert phases['category']['items'] == 4
+    assert phases['http_transfer']['items'] == 0
+
+
+def test_disabled_profiler_yields_counters():
+    profiler = BuildProfiler()
+    with profiler.span('image_resize', counters={'items': 1}) as span:
+        span['items'] += 1
+    assert profiler.spans == []
@@ -0,0 +1,47 @@
+import json
+import time
+from pathlib import Path
+
+from quick_pose.image_hash import HashIndex
+
+
+def test_known_duplicate_check_does_not_claim():
+    hash_index = HashIndex(None)
+    hash_index.add_url('https://i.pinimg.com/a.jpg', 0b1010)
+    hash_index.add_url('https://i.pinimg.com/b.jpg', 0b1010)
+
+    assert not hash_index.is_known_duplicate('https://i.pinimg.com/a.jpg')
+    assert not hash_index.is_known_duplicate('https://i.pinimg.com/b.jpg')
+    assert hash_index.claim(0b1010)
+    assert not hash_index.claim(0b1010)
+    assert hash_index.is_known_duplicate('https://i.pinimg.com/b.jpg')
+
+
+def test_published_hashes_are_duplicates():
+    hash_index = HashIndex(None)
+    hash_index.add_url('https://i.pinimg.com/a.jpg', 0xff00)
+    hash_index.add_published([0xff01])
+
+    assert hash_index.is_known_duplicate('https://i.pinimg.com/a.jpg')
+    assert hash_index.is_published(0xff00)
+    assert not hash_index.is_published(0x00ff)
+
+
+def test_save_expires_and_caps_entries(tmp_path: Path):
+    path = tmp_path.joinpath('hashes.json')
+    now = time.time()
+    path.write_text(json.dumps({
+        'urls': {'legacy': 1, 'stale': [2, now - 10_000], 'fresh': [3, now - 10], 'recent': [4, now]},
+        'published': [10, 11, 12],
+    }))
+
+    hash_index = HashIndex(path, url_ttl=1_000, max_urls=2, max_published=2)
+    assert set(hash_index.urls) == {'legacy', 'fresh', 'recent'}
+    assert hash_index.published == [11, 12]
+
+    hash_index.add_published([13])
+    hash_index.save()
+    saved = json.loads(path.read_text())
+    assert len(saved['urls']) == 2
+    assert 'fresh' not in saved['urls']
+    assert saved['published'] == [12, 13]
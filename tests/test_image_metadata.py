@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from quick_pose.image_metadata import box_blur, describe_image, thumbnail_filepath
+
+
+def test_box_blur_matches_window_mean():
+    pixels = np.random.default_rng(0).random((5, 7, 3)) * 255
+    padded = np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    expected = sum(padded[y:y + 5, x:x + 7] for y in range(3) for x in range(3)) / 9
+    assert np.allclose(box_blur(pixels, 1), expected)
+
+
+def test_describe_image_percent_encodes_srcset_urls(tmp_path: Path):
+    image_filepath = tmp_path.joinpath('abc.jpg')
+    Image.new('RGB', (1200, 800), 'teal').save(image_filepath)
+
+    image = describe_image(image_filepath, 'images/Still Life/abc.jpg', thumbnail_dimension=480)
+
+    assert image['url'] == 'images/Still%20Life/abc.jpg'
+    assert image['thumbnail_url'] == 'images/Still%20Life/thumbs/abc.jpg'
+    assert (image['width'], image['height']) == (1200, 800)
+    assert (image['thumbnail_width'], image['thumbnail_height']) == (480, 320)
+    assert image['placeholder'].startswith('data:image/jpeg;base64,')
+    assert thumbnail_filepath(image_filepath).exists()
@@ -0,0 +1,49 @@
+import datetime
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+from pelican.settings import DEFAULT_CONFIG
+
+from plugins.quick_poser.lightbox_snapshot import SNAPSHOT_FILENAME, replay_snapshot, save_snapshot
+
+
+def _article_generator(tmp_path: Path) -> SimpleNamespace:
+    content_path = tmp_path.joinpath('content')
+    content_path.mkdir(exist_ok=True)
+    settings = {**DEFAULT_CONFIG, 'PATH': str(content_path), 'LIGHTBOX_SNAPSHOT_PATH': str(tmp_path / 'snapshot')}
+    return SimpleNamespace(settings=settings, articles=[])
+
+
+def test_snapshot_round_trip(tmp_path: Path):
+    article_generator = _article_generator(tmp_path)
+    image = {'url': 'images/Hands/abc.jpg', 'width': 1200, 'height': 800}
+    articles = [{'title': 'Hands', 'date': datetime.datetime(2026, 1, 1), 'category': 'Hands', 'images': [image]}]
+    save_snapshot(article_generator.settings, 'yadisk', articles, [])
+
+    assert replay_snapshot(article_generator, 'yadisk')
+    article, = article_generator.articles
+    assert article.title == 'Hands'
+    assert article.images == [image]
+
+
+def test_empty_snapshot_keeps_previous(tmp_path: Path):
+    article_generator = _article_generator(tmp_path)
+    articles = [{'title': 'Feet', 'date': datetime.datetime(2026, 1, 1), 'category': 'Feet', 'images': []}]
+    save_snapshot(article_generator.settings, 'pinscrape', articles, [])
+    save_snapshot(article_generator.settings, 'pinscrape', [], [])
+
+    assert replay_snapshot(article_generator, 'pinscrape')
+    assert len(article_generator.articles) == 1
+
+
+def test_snapshot_of_another_version_is_ignored(tmp_path: Path):
+    article_generator = _article_generator(tmp_path)
+    snapshot_filepath = tmp_path.joinpath('snapshot', 'yadisk', SNAPSHOT_FILENAME)
+    snapshot_filepath.parent.mkdir(parents=True)
+    snapshot_filepath.write_text(json.dumps([
+        {'title': 'Hands', 'date': '2026-01-01T00:00:00', 'category': 'Hands', 'images': ['images/Hands/abc.jpg']},
+    ]))
+
+    assert not replay_snapshot(article_generator, 'yadisk')
+    assert article_generator.articles == []
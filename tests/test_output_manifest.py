@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from quick_pose.output_manifest import prune_unreferenced, referenced_urls
+
+
+def test_referenced_urls_reads_whole_attribute_values():
+    page = ('<a href="images/Still Life/a.jpg"><img src=\'images/b.jpg\' '
+            'srcset="images/c.jpg 480w,images/d.jpg,  images/e%20f.jpg 2x" alt="images/g.jpg"></a>')
+    assert list(referenced_urls(page)) == [
+        'images/Still Life/a.jpg', 'images/b.jpg', 'images/c.jpg', 'images/d.jpg', 'images/e%20f.jpg']
+
+
+def test_prune_unreferenced_keeps_images_with_spaces(tmp_path: Path):
+    category_path = tmp_path.joinpath('images', 'Still Life')
+    for name in ('abc.jpg', 'thumbs/abc.jpg', 'orphan.jpg'):
+        category_path.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        category_path.joinpath(name).touch()
+    tmp_path.joinpath('index.html').write_text(
+        '<a href="images/Still%20Life/abc.jpg"><img src="images/Still Life/thumbs/abc.jpg" '
+        'srcset="images/Still%20Life/thumbs/abc.jpg 480w, images/Still%20Life/abc.jpg 2560w"></a>')
+
+    assert prune_unreferenced(tmp_path, 'images') == ['images/Still Life/orphan.jpg']
+    assert category_path.joinpath('abc.jpg').exists()
+    assert category_path.joinpath('thumbs', 'abc.jpg').exists()
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pytest
+
+from plugins.quick_poser.pinscrape_lightbox_generator import PinterestImageScraper
+
+BING_FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'bing'
+BING_PAGES = sorted(BING_FIXTURES_PATH.glob('*.html'))
+
+
+@pytest.mark.parametrize('page', BING_PAGES, ids=lambda page: page.stem)
+def test_extract_image_urls_matches_parser(page: Path):
+    body = page.read_bytes()
+    assert PinterestImageScraper.extract_image_urls(body) == PinterestImageScraper.parse_image_urls(body)
+
+
+def test_get_pinterest_links_keeps_pinterest_images_only():
+    body = BING_FIXTURES_PATH.joinpath('figure_drawing_reference.html').read_bytes()
+    pinterest_urls, all_urls = PinterestImageScraper.get_pinterest_links(body)
+    assert len(all_urls) == 35
+    assert pinterest_urls
+    assert all(url.startswith('https://i.pinimg.com/') for url in pinterest_urls)
+    assert set(pinterest_urls) < set(all_urls)